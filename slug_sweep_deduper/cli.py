@@ -1,5 +1,6 @@
 """CLI interface for Slug Sweep Deduper."""
 
+import functools
 import os
 import sys
 from pathlib import Path
@@ -15,9 +16,27 @@ from slug_sweep_deduper.sweep import run_sweep
 console = Console()
 
 
+REQUIRED_VARS = (
+    'ARCHIVES_DB_HOST',
+    'ARCHIVES_DB_NAME',
+    'ARCHIVES_DB_USER',
+    'ARCHIVES_DB_PASSWORD',
+    'ARCHIVES_APP_URL',
+    'ARCHIVES_APP_USER',
+    'ARCHIVES_APP_PASSWORD',
+    'SWEEP_DB_LOCATION',
+    'FILE_SERVER_MOUNT',
+)
+
+
+@functools.lru_cache(maxsize=1)
 def load_env_config() -> dict:
     """Load and validate environment configuration.
     
+    The result is cached for the lifetime of the process. The .env file is
+    only read if the environment does not already provide every required
+    variable (e.g. when launched from a wrapper script).
+    
     Returns
     -------
     dict
@@ -28,24 +47,13 @@ def load_env_config() -> dict:
     SystemExit
         If required environment variables are missing
     """
-    load_dotenv()
-    
-    required_vars = [
-        'ARCHIVES_DB_HOST',
-        'ARCHIVES_DB_NAME',
-        'ARCHIVES_DB_USER',
-        'ARCHIVES_DB_PASSWORD',
-        'ARCHIVES_APP_URL',
-        'ARCHIVES_APP_USER',
-        'ARCHIVES_APP_PASSWORD',
-        'SWEEP_DB_LOCATION',
-        'FILE_SERVER_MOUNT',
-    ]
+    if not all(var in os.environ for var in REQUIRED_VARS):
+        load_dotenv()
     
     config = {}
     missing_vars = []
     
-    for var in required_vars:
+    for var in REQUIRED_VARS:
         value = os.getenv(var)
         if value is None:
             missing_vars.append(var)
@@ -129,7 +137,7 @@ def init_db():
         
         # Create new database
         console.print(f"[cyan]Creating new database at: {db_path}[/cyan]")
-        sweep_db = SweepDB(storage_location=db_location, staging_location='.')
+        sweep_db = SweepDB(storage_location=db_location)
         sweep_db.sync_to_storage()
         sweep_db.close()
         
@@ -142,20 +150,22 @@ def init_db():
 
 @main.command('sync-db')
 def sync_db():
-    """Manually sync the local database to storage.
+    """Manually sync the database to storage.
     
-    Copies the local sweep_db.sqlite to SWEEP_DB_LOCATION.
+    Stages the stored sweep_db.sqlite in a temporary directory and writes it
+    back to SWEEP_DB_LOCATION as a consistent snapshot. Sweeps sync on exit,
+    so this only rewrites the stored copy.
     """
     try:
         config = load_env_config()
         
-        local_db = Path('.') / 'sweep_db.sqlite'
-        if not local_db.exists():
-            console.print("[red]Error: No local database found (sweep_db.sqlite).[/red]")
+        db_path = Path(config['SWEEP_DB_LOCATION']) / "sweep_db.sqlite"
+        if not db_path.exists():
+            console.print(f"[red]Error: No database found at: {db_path}[/red]")
             sys.exit(1)
         
         console.print("[cyan]Syncing database to storage...[/cyan]")
-        sweep_db = SweepDB(storage_location=config['SWEEP_DB_LOCATION'], staging_location='.')
+        sweep_db = SweepDB(storage_location=config['SWEEP_DB_LOCATION'])
         sweep_db.sync_to_storage()
         sweep_db.close()
         
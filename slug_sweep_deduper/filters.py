@@ -15,11 +15,21 @@ File record structure:
 To add a new filter:
 1. Define a function following the contract: def my_filter(file_record) -> bool
 2. Add the function to the ACTIVE_FILTERS list below
+
+ACTIVE_FILTERS is fused into the single APPLY_FILTERS predicate at import
+time, so changes to the list take effect on the next run.
 """
 
 from typing import Dict, Any, List, Callable
 
 
+# Extensions of CAD support files (tuple so str.endswith can take it directly)
+_CAD_EXTS = ('.shx', '.lin', '.pat', '.pcx')
+
+# Lower-cased names of OS-generated files
+_SYSTEM_FILES = frozenset({'thumbs.db', '.ds_store', 'desktop.ini'})
+
+
 def no_filter(file_record: Dict[str, Any]) -> bool:
     """Placeholder filter that never excludes anything.
     
@@ -46,8 +56,7 @@ def exclude_cad_fonts(file_record: Dict[str, Any]) -> bool:
     typically duplicated intentionally.
     """
     filename = file_record.get('filename', '').lower()
-    cad_extensions = {'.shx', '.lin', '.pat', '.pcx'}
-    return any(filename.endswith(ext) for ext in cad_extensions)
+    return filename.endswith(_CAD_EXTS)
 
 
 def exclude_system_files(file_record: Dict[str, Any]) -> bool:
@@ -56,8 +65,7 @@ def exclude_system_files(file_record: Dict[str, Any]) -> bool:
     Example filter for excluding OS-generated files.
     """
     filename = file_record.get('filename', '').lower()
-    system_files = {'thumbs.db', '.ds_store', 'desktop.ini'}
-    return filename in system_files
+    return filename in _SYSTEM_FILES
 
 
 # List of active filters to apply during sweep
@@ -67,4 +75,40 @@ ACTIVE_FILTERS: List[Callable[[Dict[str, Any]], bool]] = [
     # Uncomment the following to enable additional filters:
     # exclude_cad_fonts,
     # exclude_system_files,
-]
\ No newline at end of file
+]
+
+
+def _compile_filters(filters: List[Callable[[Dict[str, Any]], bool]]) -> Callable[[Dict[str, Any]], bool]:
+    """Fuse a list of filters into one predicate.
+    
+    ``no_filter`` entries are dropped, and a single remaining filter is
+    returned as-is, so the common configurations cost at most one call per
+    record.
+    
+    Parameters
+    ----------
+    filters : list
+        Filter functions following the module's filter contract
+    
+    Returns
+    -------
+    callable
+        Predicate returning True if any of the filters excludes the record
+    """
+    chain = tuple(f for f in filters if f is not no_filter)
+    if not chain:
+        return no_filter
+    if len(chain) == 1:
+        return chain[0]
+
+    def fused(file_record: Dict[str, Any], _chain=chain) -> bool:
+        for filter_func in _chain:
+            if filter_func(file_record):
+                return True
+        return False
+
+    return fused
+
+
+# Single predicate equivalent to applying every filter in ACTIVE_FILTERS
+APPLY_FILTERS = _compile_filters(ACTIVE_FILTERS)
@@ -2,11 +2,13 @@ import httpx
 import os
 import sqlite3
 import shutil
-from datetime import datetime
+import tempfile
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional, List, Dict, Any
-from urllib import parse
+from typing import Optional, List, Dict, Any, Iterable, Iterator, Tuple
 import psycopg
+from psycopg.rows import dict_row
 
 
 class ArchivesApp:
@@ -17,17 +19,35 @@ class ArchivesApp:
         self.password = password
         self.app_url = app_url
         
-        # Determine protocol based on app_url
+        # Determine protocol based on app_url (resolved once, here)
         protocol = "https://" if not self.app_url.startswith(("http://", "https://")) else ""
-        base_url = f"{protocol}{self.app_url}"
+        self.base_url = f"{protocol}{self.app_url}".rstrip("/")
         
-        self.edit_url_template = f"{base_url}/api/server_change?edit_type={{}}&old_path={{}}&new_path={{}}"
+        # Fixed endpoint URLs; query arguments go in httpx ``params=``
+        self._edit_endpoint = f"{self.base_url}/api/server_change"
         self.request_headers = {'user': self.username, 'password': self.password}
-        self.consolidation_url_template = f"{base_url}/api/consolidate_dirs?asset_path={{}}&destination_path={{}}"
-        self.archiving_url_template = f"{base_url}/api/upload_file"
-        self.project_location_url_template = f"{base_url}/api/project_location"
-        self.file_locations_url_template = f"{base_url}/api/archived_or_not"
-    
+        self._consolidation_endpoint = f"{self.base_url}/api/consolidate_dirs"
+        self._archiving_endpoint = f"{self.base_url}/api/upload_file"
+        self._project_location_endpoint = f"{self.base_url}/api/project_location"
+        self._file_locations_endpoint = f"{self.base_url}/api/archived_or_not"
+
+        # Persistent client so successive requests reuse the TCP/TLS session.
+        # verify/retries live on the transport, which overrides the client's own.
+        self._client = httpx.Client(
+            headers=self.request_headers,
+            timeout=30.0,
+            transport=httpx.HTTPTransport(verify=False, retries=2)
+        )
+
+    @staticmethod
+    def _delete_params(target_path: str) -> Dict[str, str]:
+        """Query parameters for a DELETE server_change request."""
+        return {'edit_type': 'DELETE', 'old_path': target_path, 'new_path': ''}
+
+    def close(self):
+        """Close the underlying HTTP connection pool."""
+        self._client.close()
+
     def enqueue_delete_edit(self, target_path: str) -> tuple[bool, Optional[str]]:
         """Enqueue a deletion task via the Archives App API.
         
@@ -35,13 +55,9 @@ class ArchivesApp:
             tuple[bool, Optional[str]]: (success, error_message)
         """
         try:
-            old_path = parse.quote(target_path)
-            delete_url = self.edit_url_template.format('DELETE', old_path, '')
-            delete_response = httpx.get(
-                url=delete_url,
-                headers=self.request_headers,
-                verify=False,
-                timeout=30.0
+            delete_response = self._client.get(
+                self._edit_endpoint,
+                params=self._delete_params(target_path)
             )
             delete_response.raise_for_status()
             return (True, None)
@@ -49,32 +65,135 @@ class ArchivesApp:
             return (False, str(e))
 
 
+# Ids per IN (...) list; stays under SQLite's 999 host-parameter limit on older builds
+_SQLITE_IN_CHUNK = 900
+
+# SweepDB statements, defined once so each connection's statement cache
+# keeps them compiled for the whole sweep
+_SQL_IS_FILE_PROCESSED = "SELECT 1 FROM processed_files WHERE archives_app_file_id = ?"
+_SQL_FILTER_PROCESSED_IDS = "SELECT archives_app_file_id FROM processed_files WHERE archives_app_file_id IN ({})"
+_SQL_IS_LOCATION_COMPLETED = "SELECT 1 FROM processed_locations WHERE location_path = ? AND completed = 1"
+_SQL_MARK_LOCATION_COMPLETED = "UPDATE processed_locations SET completed = 1 WHERE id = ?"
+_SQL_COMPLETE_LOCATION_BY_PATH = "UPDATE processed_locations SET completed = 1 WHERE location_path = ?"
+_SQL_INSERT_PROCESSED_LOCATION = """
+    INSERT INTO processed_locations (location_path, datetime, duplicates_count, completed)
+    VALUES (?, strftime('%Y-%m-%dT%H:%M:%fZ', 'now'), ?, ?)
+"""
+_SQL_INSERT_PROCESSED_FILE = """
+    INSERT INTO processed_files (archives_app_file_id, processed_location_id, decision, processed_at)
+    VALUES (?, ?, ?, strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+"""
+_SQL_INSERT_DELETED_FILE = """
+    INSERT INTO deleted_files (processed_file_id, path, file_size, deleted_at)
+    VALUES (?, ?, ?, strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+"""
+_SQL_INSERT_ERROR = """
+    INSERT INTO errors (operation, message, timestamp, context)
+    VALUES (?, ?, strftime('%Y-%m-%dT%H:%M:%fZ', 'now'), ?)
+"""
+
+
 class SweepDB:
     """Manages the local SQLite tracking database."""
 
-    def __init__(self, storage_location: str, staging_location: str = "."):
+    def __init__(self, storage_location: str, staging_location: Optional[str] = None):
+        """
+        Parameters
+        ----------
+        storage_location : str
+            Directory holding the canonical sweep_db.sqlite (e.g. the CIFS share)
+        staging_location : str, optional
+            Local directory to work in. Defaults to a fresh temporary directory,
+            which is removed on close(). Pass ":memory:" to keep the working
+            copy in memory; it is only persisted by sync_to_storage().
+        """
         self.storage_location = Path(storage_location)
-        self.staging_location = Path(staging_location)
         self.filename = "sweep_db.sqlite"
-        
         self.storage_path = self.storage_location / self.filename
-        self.staging_path = self.staging_location / self.filename
+
+        self.in_memory = staging_location == ":memory:"
+        self._owns_staging = staging_location is None
+        if self.in_memory:
+            self.staging_location = None
+            self.staging_path = None
+        else:
+            if self._owns_staging:
+                staging_location = tempfile.mkdtemp(prefix="sweep_db_")
+            self.staging_location = Path(staging_location)
+            self.staging_path = self.staging_location / self.filename
         
         self.conn: Optional[sqlite3.Connection] = None
+        self._in_batch = False
         
-        # Copy database from storage to staging, or create new if missing
-        if self.storage_path.exists():
-            shutil.copy2(self.storage_path, self.staging_path)
+        if self.in_memory:
+            # Load the stored database into memory, or build a fresh schema
+            self.conn = self._connect()
+            if self.storage_path.exists():
+                stored = sqlite3.connect(str(self.storage_path))
+                try:
+                    stored.backup(self.conn)
+                finally:
+                    stored.close()
+            else:
+                self._create_schema(self.conn)
         else:
-            self._create_new_db()
-        
-        # Open connection to staging database
-        self.conn = sqlite3.connect(str(self.staging_path))
+            # Copy database from storage to staging, or create new if missing
+            if self.storage_path.exists():
+                self._remove_stale_wal()
+                shutil.copyfile(self.storage_path, self.staging_path)
+            else:
+                self._create_new_db()
+            
+            # Open connection to staging database
+            self.conn = self._connect()
         self.conn.row_factory = sqlite3.Row
 
+    def _connect(self) -> sqlite3.Connection:
+        """Open a configured connection to the staging database.
+
+        The connection runs in autocommit mode (``isolation_level=None``) so
+        transactions are controlled explicitly by ``batch()``.
+        """
+        conn = sqlite3.connect(
+            ":memory:" if self.in_memory else str(self.staging_path),
+            check_same_thread=False,
+            isolation_level=None,
+            cached_statements=256
+        )
+        self._configure_connection(conn)
+        return conn
+
+    @staticmethod
+    def _configure_connection(conn: sqlite3.Connection):
+        """Apply journaling and cache PRAGMAs suited to a local staging copy."""
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-65536")  # 64 MB
+        conn.execute("PRAGMA mmap_size=268435456")  # 256 MB
+
+    def _remove_stale_wal(self):
+        """Delete WAL/SHM files left in staging by an earlier run.
+
+        They belong to the previous staging copy and must not be replayed
+        against the copy fetched from storage.
+        """
+        for suffix in ("-wal", "-shm"):
+            stale = self.staging_path.with_name(self.filename + suffix)
+            if stale.exists():
+                stale.unlink()
+
     def _create_new_db(self):
-        """Create a new database with the required schema."""
-        conn = sqlite3.connect(str(self.staging_path))
+        """Create a new staging database file with the required schema."""
+        conn = self._connect()
+        try:
+            self._create_schema(conn)
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _create_schema(conn: sqlite3.Connection):
+        """Create the SweepDB tables on the given connection."""
         cursor = conn.cursor()
         
         # Create processed_locations table
@@ -124,119 +243,214 @@ class SweepDB:
         """)
         
         conn.commit()
-        conn.close()
 
-    def sync_to_storage(self):
-        """Atomically sync the staging database back to storage."""
-        if self.conn:
+    def _commit(self):
+        """Commit the current transaction unless a batch is in progress."""
+        if not self._in_batch:
             self.conn.commit()
+
+    def _begin_batch_transaction(self):
+        """Open the write transaction used by batch().
+
+        Foreign key checks are deferred to COMMIT so bulk inserts aren't
+        checked row by row; SQLite resets the pragma when the transaction ends.
+        """
+        self.conn.execute("BEGIN IMMEDIATE")
+        self.conn.execute("PRAGMA defer_foreign_keys=ON")
+
+    @contextmanager
+    def batch(self) -> Iterator["SweepDB"]:
+        """Group record_* writes into a single transaction.
+
+        Writes made inside the block are committed once on exit instead of
+        after every INSERT. Rows are committed even if the block raises, since
+        each one records an action that has already happened (e.g. an
+        enqueued deletion). Nested calls join the outer batch.
+        """
+        if self._in_batch:
+            yield self
+            return
+
+        self.conn.commit()
+        self._begin_batch_transaction()
+        self._in_batch = True
+        try:
+            yield self
+        finally:
+            self._in_batch = False
+            self.conn.commit()
+
+    def sync_to_storage(self):
+        """Atomically sync the staging database back to storage.
+        
+        Uses the SQLite online backup API to write a consistent snapshot
+        (including anything still in the WAL) to a temp file next to the
+        stored copy, then renames it into place.
+        """
+        source = self.conn
+        if source:
+            source.commit()
+        elif self.in_memory:
+            raise RuntimeError("In-memory SweepDB was closed before it was synced.")
+        elif not self.staging_path.exists():
+            # close() removes an owned temporary staging directory
+            raise RuntimeError(
+                f"Staging database {self.staging_path} no longer exists; "
+                "SweepDB was closed before it was synced."
+            )
+        else:
+            source = self._connect()
         
-        # Atomic replace: write to temp, then move
         temp_path = self.storage_location / "sweep_db.tmp"
-        shutil.copy2(self.staging_path, temp_path)
-        shutil.move(str(temp_path), str(self.storage_path))
+        if temp_path.exists():
+            temp_path.unlink()
+        
+        dest = sqlite3.connect(str(temp_path))
+        try:
+            source.backup(dest, pages=1000, sleep=0.0)
+            # The stored copy lives on a network share, where WAL is unsafe
+            dest.execute("PRAGMA journal_mode=DELETE")
+        finally:
+            dest.close()
+            if source is not self.conn:
+                source.close()
+        
+        try:
+            os.replace(os.fspath(temp_path), os.fspath(self.storage_path))
+        except OSError:
+            # Rename can be refused on some CIFS shares (or by a reader
+            # holding the file open on Windows); fall back to copy+unlink
+            shutil.move(str(temp_path), str(self.storage_path))
+
+        # Resume the batch transaction that the commit above ended
+        if self.conn and self._in_batch:
+            self._begin_batch_transaction()
 
     def close(self):
-        """Close the database connection."""
+        """Close the database connection.
+        
+        A temporary staging directory created by SweepDB is deleted, so call
+        sync_to_storage() first to keep any changes.
+        """
         if self.conn:
             self.conn.close()
             self.conn = None
+        if self._owns_staging and self.staging_location is not None:
+            shutil.rmtree(self.staging_location, ignore_errors=True)
+            self._owns_staging = False
+
+    def filter_processed_ids(self, ids: Iterable[int]) -> set[int]:
+        """Return the subset of ids that have already been processed.
+        
+        Looks the ids up with chunked ``IN (...)`` queries instead of one
+        query per id.
+        """
+        unique_ids = list(set(ids))
+
+        processed = set()
+        cursor = self.conn.cursor()
+        for start in range(0, len(unique_ids), _SQLITE_IN_CHUNK):
+            chunk = unique_ids[start:start + _SQLITE_IN_CHUNK]
+            placeholders = ", ".join("?" * len(chunk))
+            cursor.execute(_SQL_FILTER_PROCESSED_IDS.format(placeholders), chunk)
+            processed.update(row[0] for row in cursor.fetchall())
+        return processed
 
     def is_file_processed(self, archives_app_file_id: int) -> bool:
         """Check if a file_id has already been processed."""
         cursor = self.conn.cursor()
-        cursor.execute(
-            "SELECT 1 FROM processed_files WHERE archives_app_file_id = ?",
-            (archives_app_file_id,)
-        )
+        cursor.execute(_SQL_IS_FILE_PROCESSED, (archives_app_file_id,))
         return cursor.fetchone() is not None
 
     def is_location_completed(self, location_path: str) -> bool:
         """Check if a location has been marked as completed."""
         cursor = self.conn.cursor()
-        cursor.execute(
-            "SELECT 1 FROM processed_locations WHERE location_path = ? AND completed = 1",
-            (location_path,)
-        )
+        cursor.execute(_SQL_IS_LOCATION_COMPLETED, (location_path,))
         return cursor.fetchone() is not None
 
     def mark_location_completed(self, location_id: int):
         """Mark a processed location as completed."""
         cursor = self.conn.cursor()
-        cursor.execute(
-            "UPDATE processed_locations SET completed = 1 WHERE id = ?",
-            (location_id,)
-        )
-        self.conn.commit()
+        cursor.execute(_SQL_MARK_LOCATION_COMPLETED, (location_id,))
+        self._commit()
 
     def record_processed_location(self, location_path: str, duplicates_count: int, completed: bool = True) -> int:
         """Record a processed location and return its ID."""
         cursor = self.conn.cursor()
         cursor.execute(
-            """
-            INSERT INTO processed_locations (location_path, datetime, duplicates_count, completed)
-            VALUES (?, ?, ?, ?)
-            """,
-            (location_path, datetime.utcnow().isoformat(), duplicates_count, 1 if completed else 0)
+            _SQL_INSERT_PROCESSED_LOCATION,
+            (location_path, duplicates_count, 1 if completed else 0)
         )
-        self.conn.commit()
+        self._commit()
         return cursor.lastrowid
 
     def ensure_location_completed(self, location_path: str, duplicates_count: int = 0):
         """Mark the location as completed, inserting a row if needed."""
         cursor = self.conn.cursor()
-        cursor.execute(
-            "UPDATE processed_locations SET completed = 1 WHERE location_path = ?",
-            (location_path,)
-        )
+        cursor.execute(_SQL_COMPLETE_LOCATION_BY_PATH, (location_path,))
 
         if cursor.rowcount == 0:
             cursor.execute(
-                """
-                INSERT INTO processed_locations (location_path, datetime, duplicates_count, completed)
-                VALUES (?, ?, ?, 1)
-                """,
-                (location_path, datetime.utcnow().isoformat(), duplicates_count)
+                _SQL_INSERT_PROCESSED_LOCATION,
+                (location_path, duplicates_count, 1)
             )
 
-        self.conn.commit()
+        self._commit()
 
     def record_processed_file(self, archives_app_file_id: int, processed_location_id: int, decision: str) -> int:
         """Record a processed file and return its ID."""
         cursor = self.conn.cursor()
         cursor.execute(
-            """
-            INSERT INTO processed_files (archives_app_file_id, processed_location_id, decision, processed_at)
-            VALUES (?, ?, ?, ?)
-            """,
-            (archives_app_file_id, processed_location_id, decision, datetime.utcnow().isoformat())
+            _SQL_INSERT_PROCESSED_FILE,
+            (archives_app_file_id, processed_location_id, decision)
         )
-        self.conn.commit()
+        self._commit()
         return cursor.lastrowid
 
     def record_deleted_file(self, processed_file_id: int, path: str, file_size: int):
         """Record a deleted file."""
         cursor = self.conn.cursor()
-        cursor.execute(
-            """
-            INSERT INTO deleted_files (processed_file_id, path, file_size, deleted_at)
-            VALUES (?, ?, ?, ?)
-            """,
-            (processed_file_id, path, file_size, datetime.utcnow().isoformat())
+        cursor.execute(_SQL_INSERT_DELETED_FILE, (processed_file_id, path, file_size))
+        self._commit()
+
+    def record_deleted_files(self, processed_file_id: int, deleted: List[Tuple[str, int]]):
+        """Record several deleted files for one processed file.
+
+        Parameters
+        ----------
+        processed_file_id : int
+            ID of the processed_files row the deletions belong to
+        deleted : list
+            (path, file_size) tuples, one per deleted file
+        """
+        if not deleted:
+            return
+        cursor = self.conn.cursor()
+        cursor.executemany(
+            _SQL_INSERT_DELETED_FILE,
+            [(processed_file_id, path, file_size) for path, file_size in deleted]
         )
-        self.conn.commit()
+        self._commit()
 
     def log_error(self, operation: str, message: str, context: Optional[str] = None):
         """Log an error to the database."""
         cursor = self.conn.cursor()
-        cursor.execute(
-            """
-            INSERT INTO errors (operation, message, timestamp, context)
-            VALUES (?, ?, ?, ?)
-            """,
-            (operation, message, datetime.utcnow().isoformat(), context)
-        )
-        self.conn.commit()
+        cursor.execute(_SQL_INSERT_ERROR, (operation, message, context))
+        self._commit()
+
+    def log_errors(self, errors: List[Tuple[str, str, Optional[str]]]):
+        """Log several errors to the database.
+
+        Parameters
+        ----------
+        errors : list
+            (operation, message, context) tuples, one per error
+        """
+        if not errors:
+            return
+        cursor = self.conn.cursor()
+        cursor.executemany(_SQL_INSERT_ERROR, errors)
+        self._commit()
 
 
 class ArchivesAppDB:
@@ -249,13 +463,23 @@ class ArchivesAppDB:
         self.password = password
         self.conn: Optional[psycopg.Connection] = None
 
+        # LRU of file_id -> locations, so revisiting a file skips the query
+        self._loc_cache: OrderedDict[int, Tuple[Dict[str, Any], ...]] = OrderedDict()
+
+    # Maximum number of files kept in the locations cache
+    LOCATION_CACHE_SIZE = 4096
+
     def connect(self):
-        """Establish connection to the database."""
+        """Establish connection to the database.
+        
+        Cursors return rows as dicts (``dict_row``).
+        """
         self.conn = psycopg.connect(
             host=self.host,
             dbname=self.dbname,
             user=self.user,
-            password=self.password
+            password=self.password,
+            row_factory=dict_row
         )
 
     def close(self):
@@ -264,13 +488,18 @@ class ArchivesAppDB:
             self.conn.close()
             self.conn = None
 
-    def find_duplicates_in_location(self, target_location: str) -> List[Dict[str, Any]]:
+    def find_duplicates_in_location(self, target_location: str) -> Iterator[Dict[str, Any]]:
         """Find all files with duplicates that exist in the target location.
         
-        Returns list of dicts with keys: archives_app_file_id, file_server_directories, 
+        Rows are streamed from a server-side cursor, 2000 at a time, so the
+        full result set is never held client-side. Consume the iterator fully
+        (or close it) to release the cursor.
+        
+        Yields dicts with keys: archives_app_file_id, file_server_directories, 
         filename, size, loc_count
         """
-        with self.conn.cursor() as cur:
+        with self.conn.cursor(name="dup_stream") as cur:
+            cur.itersize = 2000
             dupes_query= """
                 WITH locs AS (
                     SELECT
@@ -288,18 +517,19 @@ class ArchivesAppDB:
                 WHERE loc_count > 1
                 """
             cur.execute(dupes_query, {"target_location": target_location})
-            
-            columns = [desc[0] for desc in cur.description]
-            results = []
-            for row in cur.fetchall():
-                results.append(dict(zip(columns, row)))
-            return results
+            yield from cur
 
     def get_all_locations_for_file(self, file_id: int) -> List[Dict[str, Any]]:
         """Get all locations where a file exists.
         
+        Results are cached per file_id; see invalidate_locations.
+        
         Returns list of dicts with keys: file_server_directories, filename, size
         """
+        cached = self._cached_locations(file_id)
+        if cached is not None:
+            return cached
+
         with self.conn.cursor() as cur:
             cur.execute(
                 """
@@ -313,9 +543,70 @@ class ArchivesAppDB:
                 """,
                 {"file_id": file_id}
             )
-            
-            columns = [desc[0] for desc in cur.description]
-            results = []
-            for row in cur.fetchall():
-                results.append(dict(zip(columns, row)))
+            locations = cur.fetchall()
+
+        self._cache_locations(file_id, locations)
+        return locations
+
+    def get_all_locations_for_files(self, file_ids: List[int]) -> Dict[int, List[Dict[str, Any]]]:
+        """Get all locations for several files in a single query.
+        
+        Returns dict mapping each file_id to a list of dicts with keys:
+        file_server_directories, filename, size. File ids with no locations
+        are absent from the result. Files already in the locations cache are
+        served from it and only the rest are queried.
+        """
+        results = {}
+        missing = []
+        for file_id in file_ids:
+            cached = self._cached_locations(file_id)
+            if cached is None:
+                missing.append(file_id)
+            elif cached:
+                results[file_id] = cached
+
+        if not missing:
             return results
+
+        with self.conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT
+                    fl.file_id,
+                    fl.file_server_directories,
+                    fl.filename,
+                    f.size
+                FROM file_locations fl
+                JOIN files f ON f.id = fl.file_id
+                WHERE fl.file_id = ANY(%(ids)s)
+                """,
+                {"ids": missing}
+            )
+
+            grouped = defaultdict(list)
+            for row in cur:
+                grouped[row.pop('file_id')].append(row)
+
+        for file_id, locations in grouped.items():
+            self._cache_locations(file_id, locations)
+        results.update(grouped)
+        return results
+
+    def invalidate_locations(self, file_id: int):
+        """Drop a file's cached locations, e.g. after deleting copies of it."""
+        self._loc_cache.pop(file_id, None)
+
+    def _cached_locations(self, file_id: int) -> Optional[List[Dict[str, Any]]]:
+        """Return fresh copies of a file's cached locations, or None on a miss."""
+        cached = self._loc_cache.get(file_id)
+        if cached is None:
+            return None
+        self._loc_cache.move_to_end(file_id)
+        return [dict(loc) for loc in cached]
+
+    def _cache_locations(self, file_id: int, locations: List[Dict[str, Any]]):
+        """Store copies of a file's locations, evicting the least recently used."""
+        self._loc_cache[file_id] = tuple(dict(loc) for loc in locations)
+        self._loc_cache.move_to_end(file_id)
+        while len(self._loc_cache) > self.LOCATION_CACHE_SIZE:
+            self._loc_cache.popitem(last=False)
@@ -4,6 +4,7 @@ import os
 import re
 import time
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Any, Optional
 
@@ -12,6 +13,7 @@ from openpyxl import Workbook
 from rich.console import Console
 from rich.table import Table
 from rich.prompt import Prompt
+from rich.text import Text
 from rich import print as rprint
 
 from slug_sweep_deduper.service import SweepDB, ArchivesAppDB, ArchivesApp
@@ -22,11 +24,26 @@ from slug_sweep_deduper.utils import (
     TempFileManager,
     open_directory
 )
-from slug_sweep_deduper.filters import ACTIVE_FILTERS
+from slug_sweep_deduper.filters import APPLY_FILTERS
 
 
 console = Console()
 
+# Upper bound on concurrent delete requests sent to the Archives App
+MAX_DELETE_WORKERS = 16
+
+# Command help shown at the review prompt, parsed from markup once at import
+HELP_PANEL = Text.from_markup(
+    "\n[yellow]Commands:[/yellow]\n"
+    "  [cyan]<numbers>[/cyan] - Delete specific instances (e.g., '1 3')\n"
+    "  [cyan]c[/cyan] - Keep all copies (mark processed)\n"
+    "  [cyan]o[/cyan] - Open first accessible copy for inspection\n"
+    "  [cyan]d <#>[/cyan] - Open containing directory of a specific file\n"
+    "  [cyan]x[/cyan] - Export file paths to spreadsheet\n"
+    "  [cyan]s[/cyan] - Skip this file\n"
+    "  [cyan]q[/cyan] - Quit and sync database"
+)
+
 
 def sanitize_filename(name: str) -> str:
     """Return a filesystem-safe fragment derived from the provided name."""
@@ -37,7 +54,7 @@ def sanitize_filename(name: str) -> str:
 def export_file_paths(
     file_id: int,
     locations: List[Dict[str, Any]],
-    file_server_mount: str,
+    file_server_mount: str | Path,
     export_base: Optional[Path | str] = None,
 ) -> Path:
     """Export all file paths for a file to an Excel spreadsheet."""
@@ -69,52 +86,8 @@ def export_file_paths(
     return export_path
 
 
-def apply_filters(file_records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """Apply active filters to file records.
-    
-    Parameters
-    ----------
-    file_records : list
-        List of file record dictionaries
-    
-    Returns
-    -------
-    list
-        Filtered list of file records (excluded files removed)
-    """
-    filtered = []
-    for record in file_records:
-        excluded = False
-        for filter_func in ACTIVE_FILTERS:
-            if filter_func(record):
-                excluded = True
-                break
-        if not excluded:
-            filtered.append(record)
-    return filtered
-
-
-def group_by_file_id(file_records: List[Dict[str, Any]]) -> Dict[int, List[Dict[str, Any]]]:
-    """Group file records by archives_app_file_id.
-    
-    Parameters
-    ----------
-    file_records : list
-        List of file record dictionaries
-    
-    Returns
-    -------
-    dict
-        Dictionary mapping file_id to list of location records
-    """
-    grouped = defaultdict(list)
-    for record in file_records:
-        grouped[record['archives_app_file_id']].append(record)
-    return dict(grouped)
-
-
 def display_file_locations(file_id: int, locations: List[Dict[str, Any]], 
-                          file_server_mount: str, target_location: str) -> None:
+                          base_mount_path: Path, target_location: str) -> None:
     """Display a Rich table showing all locations for a file.
     
     Parameters
@@ -123,7 +96,7 @@ def display_file_locations(file_id: int, locations: List[Dict[str, Any]],
         The archives_app_file_id
     locations : list
         List of location dictionaries
-    file_server_mount : str
+    base_mount_path : Path
         The FILE_SERVER_MOUNT path
     target_location : str
         The target location being swept (for marking "current loc")
@@ -136,7 +109,7 @@ def display_file_locations(file_id: int, locations: List[Dict[str, Any]],
     
     for idx, loc in enumerate(locations, start=1):
         full_path = build_file_path(
-            file_server_mount,
+            base_mount_path,
             loc['file_server_directories'],
             loc['filename']
         )
@@ -150,6 +123,16 @@ def display_file_locations(file_id: int, locations: List[Dict[str, Any]],
     console.print(table)
 
 
+# Commands that take no arguments, mapped to their command type
+_SINGLE_LETTER_COMMANDS = {
+    'c': 'keep',
+    's': 'skip',
+    'q': 'quit',
+    'o': 'open',
+    'x': 'export',
+}
+
+
 def parse_user_command(command: str) -> tuple[str, List[int]]:
     """Parse user command input.
     
@@ -169,29 +152,22 @@ def parse_user_command(command: str) -> tuple[str, List[int]]:
     if not command:
         return ('invalid', [])
     
-    if command == 'c':
-        return ('keep', [])
-    elif command == 's':
-        return ('skip', [])
-    elif command == 'q':
-        return ('quit', [])
-    elif command == 'o':
-        return ('open', [])
-    elif command == 'x':
-        return ('export', [])
-    elif command.startswith('d '):
+    command_type = _SINGLE_LETTER_COMMANDS.get(command)
+    if command_type is not None:
+        return (command_type, [])
+    
+    tokens = command.split()
+    if command.startswith('d '):
         try:
-            num = int(command.split()[1])
-            return ('directory', [num])
+            return ('directory', [int(tokens[1])])
         except (IndexError, ValueError):
             return ('invalid', [])
-    else:
-        # Try to parse as numbers for deletion
-        try:
-            numbers = [int(x) for x in command.split()]
-            return ('delete', numbers)
-        except ValueError:
-            return ('invalid', [])
+    
+    # Try to parse as numbers for deletion
+    try:
+        return ('delete', [int(x) for x in tokens])
+    except ValueError:
+        return ('invalid', [])
 
 
 def run_sweep(location_path: str, env_config: Dict[str, str], debug: bool = False) -> None:
@@ -209,10 +185,7 @@ def run_sweep(location_path: str, env_config: Dict[str, str], debug: bool = Fals
     # Initialize services
     console.print("[cyan]Initializing services...[/cyan]")
     
-    sweep_db = SweepDB(
-        storage_location=env_config['SWEEP_DB_LOCATION'],
-        staging_location='.'
-    )
+    sweep_db = SweepDB(storage_location=env_config['SWEEP_DB_LOCATION'])
     
     archives_db = ArchivesAppDB(
         host=env_config['ARCHIVES_DB_HOST'],
@@ -231,8 +204,11 @@ def run_sweep(location_path: str, env_config: Dict[str, str], debug: bool = Fals
     temp_manager = TempFileManager()
     
     try:
-        # Convert user path to query format
+        # Bind config once; the mount Path is reused for every path shown or acted on
         file_server_mount = env_config['FILE_SERVER_MOUNT']
+        base_mount_path = Path(file_server_mount)
+        
+        # Convert user path to query format
         target_location = normalize_path_for_query(location_path, file_server_mount)
         
         # Check if location has already been completed
@@ -243,47 +219,51 @@ def run_sweep(location_path: str, env_config: Dict[str, str], debug: bool = Fals
 
         console.print(f"[cyan]Querying for duplicates in:[/cyan] {target_location}")
         
-        # Query for duplicates
-        duplicate_records = archives_db.find_duplicates_in_location(target_location)
+        # Stream duplicates from the server, filtering and grouping rows as
+        # they arrive so no intermediate record list is ever built
+        instance_count = 0
+        filtered_count = 0
+        duplicate_file_ids = set()
+        grouped = defaultdict(list)
+        for rec in archives_db.find_duplicates_in_location(target_location):
+            instance_count += 1
+            file_id = rec['archives_app_file_id']
+            duplicate_file_ids.add(file_id)
+            if APPLY_FILTERS(rec):
+                continue
+            filtered_count += 1
+            grouped[file_id].append(rec)
         
-        total_duplicate_files = len({rec['archives_app_file_id'] for rec in duplicate_records})
+        total_duplicate_files = len(duplicate_file_ids)
 
-        if not duplicate_records:
+        if not instance_count:
             sweep_db.ensure_location_completed(location_path, duplicates_count=0)
             console.print("[yellow]No duplicate files found in this location.[/yellow]")
             return
         
-        console.print(f"[green]Found {len(duplicate_records)} duplicate file instances.[/green]")
+        console.print(f"[green]Found {instance_count} duplicate file instances.[/green]")
+        console.print(f"[green]After filtering: {filtered_count} file instances to review.[/green]")
         
-        # Apply filters
-        filtered_records = apply_filters(duplicate_records)
-        console.print(f"[green]After filtering: {len(filtered_records)} file instances to review.[/green]")
-
-        if not filtered_records:
+        if not grouped:
             sweep_db.ensure_location_completed(location_path, duplicates_count=total_duplicate_files)
             console.print("[yellow]All duplicates were excluded by filters. Recorded as completed.[/yellow]")
             return
         
-        # Remove already-processed files
-        unprocessed_records = [
-            rec for rec in filtered_records 
-            if not sweep_db.is_file_processed(rec['archives_app_file_id'])
-        ]
+        # Drop already-processed files with one batched lookup over the
+        # candidate ids, rather than preloading every id ever processed
+        unprocessed_count = filtered_count
+        for file_id in sweep_db.filter_processed_ids(grouped):
+            unprocessed_count -= len(grouped.pop(file_id))
         
-        console.print(f"[green]Unprocessed files: {len(unprocessed_records)} instances.[/green]")
+        console.print(f"[green]Unprocessed files: {unprocessed_count} instances.[/green]")
 
-        if not unprocessed_records:
+        if not grouped:
             sweep_db.ensure_location_completed(location_path, duplicates_count=total_duplicate_files)
             console.print("[yellow]All duplicates in this location have already been processed. Recorded as completed.[/yellow]")
             return
         
-        # Group by file_id
-        grouped = group_by_file_id(unprocessed_records)
-        
-        if not grouped:
-            sweep_db.ensure_location_completed(location_path, duplicates_count=total_duplicate_files)
-            console.print("[yellow]All files have already been processed.[/yellow]")
-            return
+        # Fetch every location of every file under review in one query
+        all_locations_by_file = archives_db.get_all_locations_for_files(list(grouped.keys()))
         
         console.print(f"[green]Ready to review {len(grouped)} unique files.[/green]\n")
         
@@ -305,28 +285,24 @@ def run_sweep(location_path: str, env_config: Dict[str, str], debug: bool = Fals
         for file_idx, file_id in enumerate(file_ids, start=1):
             console.print(f"\n[bold cyan]File {file_idx} of {len(file_ids)}[/bold cyan]")
             
-            # Get ALL locations for this file
-            all_locations = archives_db.get_all_locations_for_file(file_id)
+            # Get ALL locations for this file (prefetched above)
+            all_locations = all_locations_by_file.get(file_id)
+            if not all_locations:
+                all_locations = archives_db.get_all_locations_for_file(file_id)
             
             # Display table
-            display_file_locations(file_id, all_locations, file_server_mount, target_location)
+            display_file_locations(file_id, all_locations, base_mount_path, target_location)
             
-            # Interactive prompt loop for this file
+            # Interactive prompt loop for this file; help is shown once per
+            # file and again only after an invalid command
+            console.print(HELP_PANEL)
             while True:
-                console.print("\n[yellow]Commands:[/yellow]")
-                console.print("  [cyan]<numbers>[/cyan] - Delete specific instances (e.g., '1 3')")
-                console.print("  [cyan]c[/cyan] - Keep all copies (mark processed)")
-                console.print("  [cyan]o[/cyan] - Open first accessible copy for inspection")
-                console.print("  [cyan]d <#>[/cyan] - Open containing directory of a specific file")
-                console.print("  [cyan]x[/cyan] - Export file paths to spreadsheet")
-                console.print("  [cyan]s[/cyan] - Skip this file")
-                console.print("  [cyan]q[/cyan] - Quit and sync database")
-                
                 user_input = Prompt.ask("\nYour choice")
                 cmd_type, numbers = parse_user_command(user_input)
                 
                 if cmd_type == 'invalid':
                     console.print("[red]Invalid command. Please try again.[/red]")
+                    console.print(HELP_PANEL)
                     continue
                 
                 elif cmd_type == 'quit':
@@ -356,7 +332,7 @@ def run_sweep(location_path: str, env_config: Dict[str, str], debug: bool = Fals
                         export_path = export_file_paths(
                             file_id=file_id,
                             locations=all_locations,
-                            file_server_mount=file_server_mount
+                            file_server_mount=base_mount_path
                         )
                     except OSError as err:
                         console.print(f"[red]Failed to export file paths: {err}[/red]")
@@ -378,7 +354,7 @@ def run_sweep(location_path: str, env_config: Dict[str, str], debug: bool = Fals
                         loc = all_locations[num - 1]
                         # Build path to the directory, not the file
                         dir_path = build_file_path(
-                            file_server_mount,
+                            base_mount_path,
                             loc['file_server_directories']
                         )
                         console.print(f"[cyan]Opening directory: {dir_path}[/cyan]")
@@ -393,7 +369,7 @@ def run_sweep(location_path: str, env_config: Dict[str, str], debug: bool = Fals
                     opened = False
                     for loc in all_locations:
                         file_path = build_file_path(
-                            file_server_mount,
+                            base_mount_path,
                             loc['file_server_directories'],
                             loc['filename']
                         )
@@ -412,16 +388,21 @@ def run_sweep(location_path: str, env_config: Dict[str, str], debug: bool = Fals
                         console.print("[red]No valid file numbers specified.[/red]")
                         continue
                     
-                    # Confirm deletion
-                    console.print(f"\n[yellow]You are about to delete {len(valid_numbers)} file(s):[/yellow]")
+                    # Build each selected path once for both confirmation and deletion
+                    to_delete = []
                     for num in valid_numbers:
                         loc = all_locations[num - 1]
                         file_path = build_file_path(
-                            file_server_mount,
+                            base_mount_path,
                             loc['file_server_directories'],
                             loc['filename']
                         )
-                        console.print(f"  [{num}] {file_path}")
+                        to_delete.append((num, loc, str(file_path)))
+                
+                    # Confirm deletion
+                    console.print(f"\n[yellow]You are about to delete {len(valid_numbers)} file(s):[/yellow]")
+                    for num, _, path in to_delete:
+                        console.print(f"  [{num}] {path}")
                     
                     confirm = Prompt.ask("\nConfirm deletion? (yes/no)", default="no")
                     if confirm.lower() not in ['yes', 'y']:
@@ -434,41 +415,41 @@ def run_sweep(location_path: str, env_config: Dict[str, str], debug: bool = Fals
                     else:
                         decision = 'deleted_some'
                     
-                    processed_file_id = sweep_db.record_processed_file(
-                        archives_app_file_id=file_id,
-                        processed_location_id=location_id,
-                        decision=decision
-                    )
+                    # Enqueue all selected deletions concurrently
+                    for _, _, path in to_delete:
+                        console.print(f"[cyan]Deleting: {path}[/cyan]")
                     
-                    # Delete each selected file
-                    for num in valid_numbers:
-                        loc = all_locations[num - 1]
-                        file_path = build_file_path(
-                            file_server_mount,
-                            loc['file_server_directories'],
-                            loc['filename']
-                        )
-                        
-                        console.print(f"[cyan]Deleting: {file_path}[/cyan]")
-                        success, error = archives_app.enqueue_delete_edit(str(file_path))
-                        
+                    # Requests share the client's keep-alive pool; results keep input order
+                    workers = min(MAX_DELETE_WORKERS, len(to_delete))
+                    with ThreadPoolExecutor(max_workers=workers) as executor:
+                        results = list(executor.map(
+                            archives_app.enqueue_delete_edit,
+                            [path for _, _, path in to_delete]
+                        ))
+                    
+                    deleted = []
+                    errors = []
+                    for (_, loc, path), (success, error) in zip(to_delete, results):
                         if success:
-                            # Record deletion
-                            sweep_db.record_deleted_file(
-                                processed_file_id=processed_file_id,
-                                path=str(file_path),
-                                file_size=loc['size']
-                            )
-                            console.print("[green]Deletion task enqueued successfully.[/green]")
+                            deleted.append((path, loc['size']))
+                            console.print(f"[green]Deletion task enqueued: {path}[/green]")
                         else:
-                            # Log error
-                            sweep_db.log_error(
-                                operation='delete',
-                                message=error,
-                                context=str(file_path)
-                            )
-                            console.print(f"[red]Error enqueuing deletion: {error}[/red]")
+                            errors.append(('delete', error, path))
+                            console.print(f"[red]Error enqueuing deletion of {path}: {error}[/red]")
+                    
+                    # Record this file's decision, deletions and errors in one
+                    # transaction, committed before moving on to the next file
+                    with sweep_db.batch():
+                        processed_file_id = sweep_db.record_processed_file(
+                            archives_app_file_id=file_id,
+                            processed_location_id=location_id,
+                            decision=decision
+                        )
+                        sweep_db.record_deleted_files(processed_file_id, deleted)
+                        sweep_db.log_errors(errors)
                     
+                    # The cached location list no longer reflects the server
+                    archives_db.invalidate_locations(file_id)
                     console.print("[green]File processed.[/green]")
                     break
             
@@ -505,5 +486,6 @@ def run_sweep(location_path: str, env_config: Dict[str, str], debug: bool = Fals
         sweep_db.sync_to_storage()
         sweep_db.close()
         archives_db.close()
+        archives_app.close()
         temp_manager.cleanup()
         console.print("[green]Sweep complete.[/green]")
\ No newline at end of file
@@ -1,3 +1,4 @@
+import functools
 import os
 import re
 import shutil
@@ -7,7 +8,33 @@ from pathlib import Path, PurePosixPath
 from typing import Optional
 
 
-def build_file_path(base_mount: str,
+# Path-style classifiers used by split_path
+_WIN_RE = re.compile(r"^[A-Za-z]:\\(.+)$")
+_LINUX_RE = re.compile(r"^/([^/]+/)*[^/]+$")
+
+# (unit, power-of-two shift, decimal places) used by format_file_size
+_SIZE_UNITS = (("B", 0, 0), ("KB", 10, 0), ("MB", 20, 1), ("GB", 30, 2))
+
+
+@functools.lru_cache(maxsize=1024)
+def _posix_parts(server_dir: str) -> tuple[str, ...]:
+    """Split a forward-slash server directory into its segments (memoized)."""
+    return PurePosixPath(server_dir).parts
+
+
+@functools.lru_cache(maxsize=128)
+def _resolved_path(path_str: str) -> Path:
+    """Return the expanded, resolved form of a path (memoized).
+
+    resolve() canonicalises on-disk case on Windows and follows symlinks and
+    junctions, which the case-sensitive Postgres LIKE on
+    file_server_directories relies on. The mount and target path are the
+    same for a whole sweep, so caching keeps the filesystem hits to one each.
+    """
+    return Path(path_str).expanduser().resolve()
+
+
+def build_file_path(base_mount: str | Path,
                     server_dir: str,
                     filename: str = None) -> Path:
     """
@@ -16,7 +43,7 @@ def build_file_path(base_mount: str,
 
     Parameters
     ----------
-    base_mount : str
+    base_mount : str | Path
         The local mount of the records share, e.g.
         r"N:\\PPDO\\Records"  (Windows)  or  "/mnt/records" (Linux).
     server_dir : str
@@ -30,14 +57,13 @@ def build_file_path(base_mount: str,
     pathlib.Path  – ready for open(), exists(), etc.
     """
     # 1) Treat the DB field as a *POSIX* path (it always uses “/”)
-    rel_parts = PurePosixPath(server_dir).parts     # -> tuple of segments
+    rel_parts = _posix_parts(server_dir)            # -> tuple of segments
 
-    # 2) Let Path figure out the separator style of this machine
-    full_path = Path(base_mount).joinpath(*rel_parts)
+    # 2) Let Path figure out the separator style of this machine, building
+    #    the whole path in one constructor call
     if filename:
-        full_path = full_path.joinpath(filename)
-
-    return full_path
+        return Path(base_mount, *rel_parts, filename)
+    return Path(base_mount, *rel_parts)
 
 
 def split_path(path):
@@ -53,12 +79,9 @@ def split_path(path):
         :param filepath: The filepath to detect.
         :return: The OS of the filepath. (Windows, Linux, or Unknown)
         """
-        windows_pattern = r"^[A-Za-z]:\\(.+)$"
-        linux_pattern = r"^/([^/]+/)*[^/]+$"
-
-        if re.match(windows_pattern, filepath):
+        if _WIN_RE.match(filepath):
             return "Windows"
-        elif re.match(linux_pattern, filepath):
+        elif _LINUX_RE.match(filepath):
             return "Linux"
         else:
             return "Unknown"
@@ -66,7 +89,6 @@ def split_path(path):
     def split_windows_path(filepath):
         """"""
         parts = []
-        curr_part = ""
         is_absolute = False
 
         if filepath.startswith("\\\\"):
@@ -79,20 +101,12 @@ def split_path(path):
             filepath = filepath[2:]
             is_absolute = True
 
-        for char in filepath:
-            if char == "\\":
-                if curr_part:
-                    parts.append(curr_part)
-                    curr_part = ""
-            else:
-                curr_part += char
-
-        if curr_part:
-            parts.append(curr_part)
+        # Split the remainder in one pass, dropping empty segments
+        parts.extend(part for part in filepath.split("\\") if part)
 
         if not is_absolute and not parts:
-            # Relative path with a single directory or filename
-            parts.append(curr_part)
+            # Empty relative path
+            parts.append("")
 
         return parts
     
@@ -135,8 +149,8 @@ def extract_server_dirs(full_path: str | Path, base_mount: str | Path) -> str:
               (always forward-slash separators, no leading slash)
     """
     # Normalise to platform-aware Path objects
-    full = Path(full_path).expanduser().resolve()
-    base = Path(base_mount).expanduser().resolve()
+    full = _resolved_path(os.fspath(full_path))
+    base = _resolved_path(os.fspath(base_mount))
 
     # 1) Get the sub-path *relative* to the mount
     try:
@@ -182,14 +196,12 @@ def format_file_size(size_bytes: int) -> str:
     str
         Formatted size string (e.g., "1.5 MB", "823 KB")
     """
-    if size_bytes < 1024:
+    # bit_length picks the 1024-power directly; sizes past GB stay in GB
+    idx = min(3, max(0, (size_bytes.bit_length() - 1) // 10))
+    if idx == 0:
         return f"{size_bytes} B"
-    elif size_bytes < 1024 * 1024:
-        return f"{size_bytes / 1024:.0f} KB"
-    elif size_bytes < 1024 * 1024 * 1024:
-        return f"{size_bytes / (1024 * 1024):.1f} MB"
-    else:
-        return f"{size_bytes / (1024 * 1024 * 1024):.2f} GB"
+    name, shift, precision = _SIZE_UNITS[idx]
+    return f"{size_bytes / (1 << shift):.{precision}f} {name}"
 
 
 def open_directory(path: Path) -> bool:
@@ -223,6 +235,8 @@ class TempFileManager:
     
     def __init__(self):
         self.temp_dir: Optional[Path] = None
+        # temp copy -> the source it was copied from, for reuse on re-open
+        self._copied_from: dict[Path, Path] = {}
     
     def get_temp_dir(self) -> Path:
         """Get or create the temporary directory."""
@@ -248,11 +262,19 @@ class TempFileManager:
             temp_dir = self.get_temp_dir()
             dest_path = temp_dir / source_path.name
             
-            # Copy file to temp directory
-            shutil.copy2(source_path, dest_path)
+            # Copy file to temp directory, unless this exact source is already
+            # there (different files can share a name, so match on source).
+            # File metadata isn't needed for a preview, so skip copy2's copystat.
+            if self._copied_from.get(dest_path) != source_path or not dest_path.exists():
+                shutil.copyfile(source_path, dest_path)
+                self._copied_from[dest_path] = source_path
             
-            # Open with default application (Windows)
-            subprocess.Popen(['cmd', '/c', 'start', '', str(dest_path)], shell=False)
+            # Open with default application; startfile goes straight to
+            # ShellExecute instead of spawning cmd.exe to run 'start'
+            if os.name == 'nt':
+                os.startfile(str(dest_path))
+            else:
+                subprocess.Popen(['xdg-open', str(dest_path)])
             
             return True
         except Exception as e:
@@ -264,3 +286,4 @@ class TempFileManager:
         if self.temp_dir and self.temp_dir.exists():
             shutil.rmtree(self.temp_dir, ignore_errors=True)
             self.temp_dir = None
+        self._copied_from.clear()